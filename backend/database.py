@@ -1,12 +1,37 @@
 # database.py
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime
+from sqlalchemy import create_engine, event, Column, Index, Integer, String, Float, DateTime
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
 
 DATABASE_URL = "sqlite:///certivo_v2.db"
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+# Single writer: SQLite serializes writes anyway, so queue them in the pool
+# instead of letting extra connections spin on SQLITE_BUSY
+engine = create_engine(
+    DATABASE_URL,
+    connect_args={"check_same_thread": False, "cached_statements": 256, "timeout": 5},
+    pool_size=1,
+    max_overflow=0,
+)
+
+# Server profile: WAL so readers don't block the writer, no fsync per commit
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA cache_size=-20000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+)
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -14,15 +39,22 @@ class SessionRecord(Base):
     __tablename__ = "sessions"
     id = Column(Integer, primary_key=True, index=True)
     session_id = Column(String, unique=True, index=True)
-    device_id = Column(String, index=True)
+    device_id = Column(String)
     trust_score = Column(Float)
     trust_level = Column(String)
     failed_challenges = Column(Integer)
     total_challenges = Column(Integer)
     timestamp_utc = Column(DateTime, default=datetime.utcnow)
 
+    # Per-device history lookups: equality on device_id, range/order on time
+    __table_args__ = (Index("ix_sessions_device_ts", "device_id", "timestamp_utc"),)
+
 def init_db():
     Base.metadata.create_all(bind=engine)
+    # create_all skips tables that already exist, so add any index declared
+    # since the database was first created
+    for index in SessionRecord.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
 
 # Initialize DB on module load
 init_db()
@@ -1,6 +1,21 @@
 import uuid
 import random
 
+# Base pool of challenge instructions, built once at import
+BASE_CHALLENGES = (
+    {"challenge_value": "Blink your eyes twice quickly", "difficulty": "medium"},
+    {"challenge_value": "Turn your head to the left then right", "difficulty": "medium"},
+    {"challenge_value": "Say 'Certivo is secure' clearly", "difficulty": "hard"},
+    {"challenge_value": "Smile widely for 3 seconds", "difficulty": "easy"},
+    {"challenge_value": "Raise your eyebrows once", "difficulty": "easy"},
+    {"challenge_value": "Open your mouth and say 'I am human'", "difficulty": "hard"},
+    {"challenge_value": "Nod your head up and down", "difficulty": "medium"},
+    {"challenge_value": "Stick your tongue out for 2 seconds", "difficulty": "easy"}
+)
+
+# Easier pool for trusted devices
+TRUSTED_CHALLENGES = tuple(ch for ch in BASE_CHALLENGES if ch["difficulty"] in ("easy", "medium"))
+
 def generate_adaptive_challenges(prev_results=[], num=3, trusted=False):
     """
     Generates a list of challenges for a verification session.
@@ -14,29 +29,14 @@ def generate_adaptive_challenges(prev_results=[], num=3, trusted=False):
     - List of dicts with challenge_id, challenge_value, difficulty
     """
 
-    # Base pool of challenge instructions
-    base_challenges = [
-        {"challenge_value": "Blink your eyes twice quickly", "difficulty": "medium"},
-        {"challenge_value": "Turn your head to the left then right", "difficulty": "medium"},
-        {"challenge_value": "Say 'Certivo is secure' clearly", "difficulty": "hard"},
-        {"challenge_value": "Smile widely for 3 seconds", "difficulty": "easy"},
-        {"challenge_value": "Raise your eyebrows once", "difficulty": "easy"},
-        {"challenge_value": "Open your mouth and say 'I am human'", "difficulty": "hard"},
-        {"challenge_value": "Nod your head up and down", "difficulty": "medium"},
-        {"challenge_value": "Stick your tongue out for 2 seconds", "difficulty": "easy"}
-    ]
-
-    # Adjust challenge pool for trusted devices (easier)
-    if trusted:
-        adjusted_pool = [ch for ch in base_challenges if ch["difficulty"] in ("easy", "medium")]
-    else:
-        adjusted_pool = base_challenges
-
-    # Randomly pick `num` unique challenges
-    selected = random.sample(adjusted_pool, k=min(num, len(adjusted_pool)))
+    # Trusted devices draw from the easier pool (fast-track)
+    pool = TRUSTED_CHALLENGES if trusted else BASE_CHALLENGES
+
+    # Randomly pick `num` unique challenges (copied, the pool is shared)
+    selected = [dict(ch) for ch in random.sample(pool, k=min(num, len(pool)))]
 
     # Assign unique challenge_id to each
     for ch in selected:
-        ch["challenge_id"] = str(uuid.uuid4())
+        ch["challenge_id"] = uuid.uuid4().hex
 
     return selected
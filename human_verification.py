@@ -22,8 +22,8 @@ def _video_motion_profile(video_path: str):
         if not ret:
             break
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        diff = cv2.absdiff(prev_gray, gray)
-        if diff.mean() > MOTION_THRESHOLD:
+        # Mean absolute frame difference in one native call (no diff buffer)
+        if cv2.norm(prev_gray, gray, cv2.NORM_L1) / gray.size > MOTION_THRESHOLD:
             total_motion += 1
         prev_gray = gray
         frames += 1
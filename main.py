@@ -1,13 +1,81 @@
-from fastapi import FastAPI, Query, Request, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, Query, Request, UploadFile, File, Form
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-import uuid
+import secrets
+import bisect
 from challenge_engine import generate_adaptive_challenges
-from typing import List
-from fastapi.responses import FileResponse
+from typing import List, Optional
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from pydantic import BaseModel, ConfigDict, ValidationError
+from fastapi.responses import FileResponse, JSONResponse
 import os
 app = FastAPI()
 
-# Allow frontend to call API
+# Reject oversized uploads before the multipart body is parsed/spooled
+MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+
+class _UploadTooLarge(HTTPException):
+    def __init__(self):
+        super().__init__(status_code=413, detail="Upload too large")
+
+class UploadSizeLimitMiddleware:
+    """
+    Caps request bodies on one path at max_bytes. Declared Content-Length is
+    checked up front; chunked bodies are counted as they are received.
+    """
+
+    def __init__(self, app, path: str, max_bytes: int):
+        self.app = app
+        self.path = path
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] != self.path:
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                if value.isdigit() and int(value) > self.max_bytes:
+                    await self._reject(scope, receive, send)
+                    return
+                break
+
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise _UploadTooLarge()
+            return message
+
+        async def tracking_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except _UploadTooLarge:
+            # Normally rendered by FastAPI's exception handling; this covers
+            # anything that lets it escape before a response has started
+            if response_started:
+                raise
+            await self._reject(scope, receive, send)
+
+    async def _reject(self, scope, receive, send):
+        response = JSONResponse(status_code=413, content={"detail": "Upload too large"})
+        await response(scope, receive, send)
+
+app.add_middleware(UploadSizeLimitMiddleware, path="/v1/verify", max_bytes=MAX_UPLOAD_BYTES)
+
+# Allow frontend to call API (added last so it wraps the 413 above)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -18,16 +86,69 @@ app.add_middleware(
 # In-memory store for trusted devices
 trusted_devices = {}  # device_id -> bool
 
-# In-memory store for session results (for demo)
-session_results_store = {}  # device_id -> List of results
+# Typed response models let FastAPI serialize straight through pydantic-core
+class VerifyResponse(BaseModel):
+    challenge_passed: bool
+    liveness_score: float
+    lip_sync_score: float
+
+@dataclass(slots=True)
+class ChallengeSubmission:
+    # Verdict kept as plain scalars; a model instance per entry would carry
+    # its own __dict__ and fields-set
+    challenge_id: str
+    token_id: str
+    challenge_passed: bool
+    liveness_score: float
+    lip_sync_score: float
+
+# In-memory store for session results (for demo). Holds at most
+# MAX_STORED_SUBMISSIONS entries in total, evicting from the least recently
+# active device first, and keeps only each device's latest submissions
+MAX_STORED_SUBMISSIONS = 100_000
+MAX_RESULTS_PER_DEVICE = 100
+session_results_store = OrderedDict()  # device_id -> deque[ChallengeSubmission]
+_stored_submissions = 0
+
+# Client-supplied ids; /v1/challenge issues 32-char hex ids
+MAX_ID_LENGTH = 64
+
+def record_session_result(device_id: str, entry: ChallengeSubmission):
+    global _stored_submissions
+    results = session_results_store.get(device_id)
+    if results is None:
+        results = session_results_store[device_id] = deque(maxlen=MAX_RESULTS_PER_DEVICE)
+    else:
+        session_results_store.move_to_end(device_id)
+    if len(results) == results.maxlen:
+        _stored_submissions -= 1  # append below drops this device's oldest entry
+    results.append(entry)
+    _stored_submissions += 1
+
+    while _stored_submissions > MAX_STORED_SUBMISSIONS:
+        oldest_device, oldest_results = next(iter(session_results_store.items()))
+        oldest_results.popleft()
+        _stored_submissions -= 1
+        if not oldest_results:
+            del session_results_store[oldest_device]
+
+class IssuedChallenge(BaseModel):
+    challenge_id: str
+    token_id: str
+    instruction: str
+    difficulty: str
+    fast_track: bool
+
+class ChallengeResponse(BaseModel):
+    trusted_device: bool
+    challenges: List[IssuedChallenge]
 
 @app.get("/v1/challenge")
-async def get_challenge(request: Request, device_id: str = Query(...)):
+async def get_challenge(device_id: str = Query(...)) -> ChallengeResponse:
     """
     Returns 3 adaptive challenges with unique token_id for verification.
     Trusted devices get Fast-Track mode.
     """
-    user_agent = request.headers.get("user-agent", "unknown")
     is_trusted = trusted_devices.get(device_id, False)
 
     # Generate challenges
@@ -35,73 +156,117 @@ async def get_challenge(request: Request, device_id: str = Query(...)):
 
     # Normalize challenges with token_id
     normalized = [
-        {
-            "challenge_id": ch.get("challenge_id"),
-            "token_id": str(uuid.uuid4()),
-            "instruction": ch.get("challenge_value"),
-            "difficulty": ch.get("difficulty", "medium"),
-            "fast_track": is_trusted
-        }
+        IssuedChallenge(
+            challenge_id=ch.get("challenge_id"),
+            token_id=secrets.token_hex(16),
+            instruction=ch.get("challenge_value"),
+            difficulty=ch.get("difficulty", "medium"),
+            fast_track=is_trusted
+        )
         for ch in challenges
     ]
 
-    return {"trusted_device": is_trusted, "challenges": normalized}
+    return ChallengeResponse(trusted_device=is_trusted, challenges=normalized)
 
 @app.post("/v1/verify")
 async def verify_challenge(
-    device_id: str = Form(...),
-    challenge_id: str = Form(...),
-    token_id: str = Form(...),
+    device_id: str = Form(..., max_length=MAX_ID_LENGTH),
+    challenge_id: str = Form(..., max_length=MAX_ID_LENGTH),
+    token_id: str = Form(..., max_length=MAX_ID_LENGTH),
     video: UploadFile = File(...)
-):
+) -> VerifyResponse:
     """
     Receives video submission for a challenge. For demo, just accepts it and
     randomly passes/fails (replace with real ML liveness verification later).
     """
     # For demo purposes, assume all videos pass
-    result = {"challenge_passed": True, "liveness_score": 0.95, "lip_sync_score": 0.9}
+    result = VerifyResponse(challenge_passed=True, liveness_score=0.95, lip_sync_score=0.9)
 
     # Store in session results
-    session_results_store.setdefault(device_id, []).append({
-        "challenge_id": challenge_id,
-        "token_id": token_id,
-        "result": result
-    })
+    record_session_result(device_id, ChallengeSubmission(
+        challenge_id, token_id,
+        result.challenge_passed, result.liveness_score, result.lip_sync_score
+    ))
 
     return result
 
+# Trust score cut-offs: below 50 low, 50-79 medium, 80+ high
+TRUST_THRESHOLDS = (50, 80)
+TRUST_LEVELS = ("low", "medium", "high")
+
+class ChallengeOutcome(BaseModel):
+    # Clients echo back the full verify response; only the verdict is scored
+    model_config = ConfigDict(extra="ignore")
+
+    challenge_passed: Optional[bool] = None
+
+class FinalizeRequest(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
+    results: Optional[List[ChallengeOutcome]] = None
+    device_id: Optional[str] = None
+
+class FinalizeResponse(BaseModel):
+    trust_score: int
+    trust_level: str
+
 @app.post("/v1/finalize")
-async def finalize_verification(request: Request):
+async def finalize_verification(request: Request) -> FinalizeResponse:
     """
     Calculates final trust score based on all challenges for the device.
+
+    The body is parsed as JSON whatever its Content-Type. Missing or null
+    fields fall back to no results / a failed challenge / device "unknown";
+    challenge_passed must otherwise be a boolean or 0/1 (422 if not).
     """
-    data = await request.json()
-    results = data.get("results", [])
-    device_id = data.get("device_id", "unknown")
+    # Validate the raw bytes in pydantic-core rather than a body parameter,
+    # which would reject JSON sent without an application/json Content-Type
+    try:
+        body = FinalizeRequest.model_validate_json(await request.body())
+    except ValidationError as exc:
+        errors = [{**e, "loc": ("body", *e["loc"])} for e in exc.errors(include_url=False)]
+        raise RequestValidationError(errors) from exc
+
+    results = body.results
+    device_id = body.device_id if body.device_id is not None else "unknown"
 
     if not results:
-        return {"trust_score": 0, "trust_level": "low"}
+        return FinalizeResponse(trust_score=0, trust_level="low")
 
     # Simple scoring: pass=100, fail=0, average all
-    score = int(sum(100 if r.get("challenge_passed") else 0 for r in results) / len(results))
+    passed = sum(1 for r in results if r.challenge_passed)
+    score = passed * 100 // len(results)
 
-    if score >= 80:
-        level = "high"
-    elif score >= 50:
-        level = "medium"
-    else:
-        level = "low"
+    level = TRUST_LEVELS[bisect.bisect_right(TRUST_THRESHOLDS, score)]
 
     # Mark device as trusted if high
     if level == "high":
         trusted_devices[device_id] = True
 
-    return {"trust_score": score, "trust_level": level}
+    return FinalizeResponse(trust_score=score, trust_level=level)
 
 # Serve index.html at root
 @app.get("/")
-def read_index():
+async def read_index():
     html_path = "index.html"  # make sure index.html is in the same folder as main.py
     if os.path.exists(html_path):
         return FileResponse(html_path)
-    return {"detail": "index.html not found"}
\ No newline at end of file
+    return {"detail": "index.html not found"}
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # "auto" picks uvloop/httptools when installed (uvicorn[standard] on
+    # Linux/macOS) and falls back to asyncio/h11 elsewhere.
+    # trusted_devices and session_results_store are per-process, so only raise
+    # CERTIVO_WORKERS once that state lives in a shared backend
+    uvicorn.run(
+        "main:app",
+        host="127.0.0.1",
+        port=8000,
+        workers=int(os.environ.get("CERTIVO_WORKERS", "1")),
+        loop="auto",
+        http="auto",
+        limit_concurrency=1000,
+    )